@@ -0,0 +1,36 @@
+# cython: language_level=3
+"""Cython fast path for classifying rule references.
+
+Build in place with:
+
+    cythonize -i _extract_refs.pyx
+
+extract_info falls back to the pure-Python implementation when this
+extension is not built.
+"""
+
+
+cpdef dict classify_references(list refs, list idents):
+    """Classify (href, text) reference pairs and (system, text) idents
+    into compliance-framework buckets."""
+    cdef str href, text, system, href_l
+    cdef list cis = [], nist = [], srg = [], stigid = [], cce = []
+
+    for href, text in refs:
+        # 'cisecurity' contains 'cis'; one substring test covers both
+        href_l = href.lower()
+        if 'cis' in href_l:
+            cis.append(text)
+        elif 'nist' in href_l:
+            nist.append(text)
+        elif 'disa' in href_l and 'SRG' in text.upper():
+            srg.append(text)
+        elif 'stigid' in href_l:
+            stigid.append(text)
+
+    for system, text in idents:
+        if 'cce' in system.lower():
+            cce.append(text)
+
+    return {'cis': cis, 'nist': nist, 'srg': srg, 'stigid': stigid,
+            'cce': cce}
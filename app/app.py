@@ -1,76 +1,296 @@
+import gzip
+import hashlib
+import json
 import os
+import pickle
 import re
-from flask import Flask, render_template_string, jsonify, abort
-from bs4 import BeautifulSoup
+import sys
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template_string, jsonify, abort, request, Response, stream_with_context
+from flask_compress import Compress
+import lxml.html as LH
+from lxml import etree
+from lxml.cssselect import CSSSelector
 
 app = Flask(__name__)
 
+# Guide JSON is highly repetitive (severity strings, id prefixes), so
+# Brotli/gzip cuts response bytes 5-10x for a little CPU.
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+Compress(app)
+
+# Compact separators for jsonify'd endpoints (profiles, search).
+app.json.compact = True
+
+# Vendored assets (see fetch_assets.sh) are immutable once deployed.
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000
+
 # CONFIGURATION: Point this to your guides directory
 GUIDES_DIR = "/opt/scap-security-guide-0.1.79/guides"
 
+# Comments and processing instructions never survive the parse; script,
+# style and link subtrees are stripped right after it. Guides carry large
+# inline <style> blocks and collapse-panel JS we never read.
+# SSG guides are always UTF-8; declaring it skips libxml2's sniffing.
+_HTML_PARSER = LH.HTMLParser(encoding='utf-8', remove_comments=True,
+                             remove_pis=True)
+
+# CSS selectors compiled once at import (cssselect translates them to
+# XPath); per-request extraction then runs entirely in libxml2 instead
+# of building Python wrapper objects per node. Class matches are exact
+# tokens, unlike the hand-written contains(@class, ...) they replace.
+_SEL_RULE_PANELS = CSSSelector('div.panel-default[id^="rule-"]')
+_SEL_TITLE = CSSSelector('h3.panel-title')
+_SEL_SEV_BADGE = CSSSelector('span.label')
+_SEL_BODY = CSSSelector('div.panel-body')
+
+# One regex scan over the badge text instead of six substring searches;
+# first match wins, so 'high'/'danger' can't be overwritten by a later hit.
+_SEV_RE = re.compile(r'\b(high|danger|medium|warning|low|info)\b', re.I)
+# Interned: the same four label strings repeat across every rule dict,
+# so all rules share one object per severity instead of per-rule copies.
+_SEV_MAP = {
+    'high': sys.intern('High'), 'danger': sys.intern('High'),
+    'medium': sys.intern('Medium'), 'warning': sys.intern('Medium'),
+    'low': sys.intern('Low'), 'info': sys.intern('Low'),
+}
+_SEV_UNKNOWN = sys.intern('Unknown')
+
+# Guide files essentially never change at runtime, so parsed rule lists
+# (and their serialized JSON bodies) are cached keyed by (filename, mtime).
+_GUIDE_CACHE = {}     # (filename, mtime_ns) -> list of rule dicts
+_RESPONSE_CACHE = {}  # (filename, mtime_ns) -> JSON bytes
+_SEARCH_INDEX = {}    # (filename, mtime_ns) -> _GuideIndex
+_CACHE_LOCK = threading.Lock()  # guards writes under threaded servers
+
+# Parsed rule lists also persist across restarts as one gzipped pickle
+# per (guide, mtime), so a fresh process skips the HTML entirely.
+_CACHE_DIR = os.environ.get('SCAP_EXPLORER_CACHE', '/var/cache/scap_explorer')
+try:
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+except OSError:
+    print(f"WARNING: Cache dir not writable, disk cache disabled: {_CACHE_DIR}")
+    _CACHE_DIR = None
+
+# Directory listing cache, invalidated when GUIDES_DIR's mtime changes.
+_PROFILES_CACHE = None
+_PROFILES_MTIME = -1
+
+# 'ssg-rhel8-guide-cis.html' -> 'Rhel8 Cis' (underscores become spaces)
+_NAME_TRANS = str.maketrans({'_': ' '})
+
+def _clipped_text(el, limit):
+    """Collects descendant text up to roughly `limit` chars, then stops.
+
+    Panel bodies can hold multi-KB remediation snippets; text_content()
+    would concatenate all of it just to be thrown away by the slice.
+    """
+    pieces = []
+    total = 0
+    for piece in el.itertext():
+        pieces.append(piece)
+        total += len(piece)
+        if total > limit:
+            break
+    text = ''.join(pieces).strip()
+    if len(text) > limit or total > limit:
+        return text[:limit] + '...'
+    return text
+
 def get_available_profiles():
     """Scans the directory for .html guide files."""
-    if not os.path.exists(GUIDES_DIR):
+    global _PROFILES_CACHE, _PROFILES_MTIME
+    try:
+        mtime = os.stat(GUIDES_DIR).st_mtime_ns
+    except OSError:
         print(f"ERROR: Directory not found: {GUIDES_DIR}")
         return []
-    files = [f for f in os.listdir(GUIDES_DIR) if f.endswith('.html')]
+    if mtime == _PROFILES_MTIME and _PROFILES_CACHE is not None:
+        return _PROFILES_CACHE
     profiles = []
-    for f in files:
-        display_name = f.replace('ssg-', '').replace('-guide-', ' ').replace('.html', '').replace('_', ' ').title()
-        profiles.append({'id': f, 'name': display_name})
-    return sorted(profiles, key=lambda x: x['name'])
+    with os.scandir(GUIDES_DIR) as entries:
+        for entry in entries:
+            f = entry.name
+            if not f.endswith('.html'):
+                continue
+            display_name = (f[:-len('.html')]
+                            .replace('ssg-', '')
+                            .replace('-guide-', ' ')
+                            .translate(_NAME_TRANS)
+                            .title())
+            profiles.append({'id': f, 'name': display_name})
+    profiles.sort(key=lambda x: x['name'])
+    _PROFILES_CACHE = profiles
+    _PROFILES_MTIME = mtime
+    return profiles
 
-def parse_guide(filename):
-    """Robust parser for OpenSCAP Bootstrap-based HTML guides."""
+def iter_guide(filename):
+    """Yields rule dicts one panel at a time while the guide is parsed."""
     path = os.path.join(GUIDES_DIR, filename)
     print(f"DEBUG: Parsing file: {path}")
-    
-    with open(path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
 
-    rules_data = []
-    
+    # lxml.html reads and decodes the file in C; no Python-side file I/O.
+    root = LH.parse(path, parser=_HTML_PARSER).getroot()
+    etree.strip_elements(root, 'script', 'style', 'link', 'noscript',
+                         with_tail=False)
+
     # OpenSCAP guides typically use 'panel-default' for each rule block
-    # and IDs starting with 'rule-'
-    rule_panels = soup.find_all('div', class_='panel-default')
-    
-    for panel in rule_panels:
-        # Check if this panel is actually a rule (OpenSCAP rules have specific IDs)
-        panel_id = panel.get('id', '')
-        if not panel_id.startswith('rule-'):
-            continue
+    # and IDs starting with 'rule-'; the compiled XPath filters both.
+    for panel in _SEL_RULE_PANELS(root):
+        panel_id = panel.get('id')
 
         # 1. Extract Title
-        title_elem = panel.find('h3', class_='panel-title')
-        title = title_elem.get_text(strip=True) if title_elem else "Unnamed Rule"
+        title_elems = _SEL_TITLE(panel)
+        title = title_elems[0].text_content().strip() if title_elems else "Unnamed Rule"
 
         # 2. Extract Severity
         # Usually looks like <span class="label label-warning">medium</span>
-        severity = "Unknown"
-        sev_badge = panel.find('span', class_='label')
-        if sev_badge:
-            text = sev_badge.get_text().lower()
-            if 'high' in text or 'danger' in text: severity = "High"
-            elif 'medium' in text or 'warning' in text: severity = "Medium"
-            elif 'low' in text or 'info' in text: severity = "Low"
+        severity = _SEV_UNKNOWN
+        sev_badges = _SEL_SEV_BADGE(panel)
+        if sev_badges:
+            m = _SEV_RE.search(sev_badges[0].text_content())
+            if m:
+                severity = _SEV_MAP[m.group(1).lower()]
 
         # 3. Extract Description
         # Description is usually in a div with class 'panel-body' or similar
-        body = panel.find('div', class_='panel-body')
         description = "No description available."
-        if body:
+        bodies = _SEL_BODY(panel)
+        if bodies:
             # We try to find the specific description text, or just take the first few paragraphs
-            desc_text = body.get_text(strip=True)
-            description = (desc_text[:350] + '...') if len(desc_text) > 350 else desc_text
+            description = _clipped_text(bodies[0], 350)
 
-        rules_data.append({
+        yield {
             'title': title,
             'severity': severity,
             'description': description,
             'id': panel_id
-        })
-    
-    print(f"DEBUG: Found {len(rules_data)} rules in {filename}")
+        }
+
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+class _GuideIndex:
+    """Inverted index over a guide's rules for server-side search.
+
+    Whole-word queries resolve through a token -> rule-id posting map;
+    fragments fall back to intersecting trigram postings and verifying
+    the few candidates, so a query costs O(hits) rather than a substring
+    scan over every rule.
+    """
+
+    def __init__(self, rules):
+        self._trigrams = defaultdict(set)
+        self._severity = {}
+        self._text = {}
+        for rule in rules:
+            rid = rule['id']
+            searchable = f"{rule['title']} {rid} {rule['description']}".lower()
+            self._severity[rid] = rule['severity']
+            self._text[rid] = searchable
+            for tok in set(_TOKEN_RE.findall(searchable)):
+                for i in range(len(tok) - 2):
+                    self._trigrams[tok[i:i + 3]].add(rid)
+
+    def search(self, query, severity=None):
+        """Returns the set of rule ids matching every query token."""
+        ids = None
+        for tok in _TOKEN_RE.findall(query.lower()):
+            # Always substring-match, like the old client-side filter:
+            # fragment candidates subsume exact-token hits, whereas
+            # preferring the token posting would drop rules where the
+            # query is only part of a longer word.
+            hit = self._fragment_candidates(tok)
+            ids = hit if ids is None else ids & hit
+            if not ids:
+                break
+        if ids is None:
+            ids = set(self._severity)
+        if severity:
+            ids = {rid for rid in ids if self._severity[rid] == severity}
+        return ids
+
+    def _fragment_candidates(self, frag):
+        if len(frag) < 3:
+            # Too short for trigrams; brute-force is fine at this length.
+            return {rid for rid, text in self._text.items() if frag in text}
+        cand = None
+        for i in range(len(frag) - 2):
+            posting = self._trigrams.get(frag[i:i + 3])
+            if not posting:
+                return set()
+            cand = set(posting) if cand is None else cand & posting
+            if not cand:
+                return set()
+        return {rid for rid in cand if frag in self._text[rid]}
+
+
+def _disk_cache_path(filename, mtime_ns):
+    return os.path.join(_CACHE_DIR, f'{filename}.{mtime_ns}.pkl.gz')
+
+
+def _disk_cache_load(filename, mtime_ns):
+    """Returns the persisted rule list for this guide mtime, or None."""
+    if _CACHE_DIR is None:
+        return None
+    try:
+        with open(_disk_cache_path(filename, mtime_ns), 'rb') as f:
+            return pickle.loads(gzip.decompress(f.read()))
+    except (OSError, pickle.PickleError, EOFError):
+        return None
+
+
+def _disk_cache_store(filename, mtime_ns, rules_data):
+    """Writes the rule list atomically and drops entries for older mtimes."""
+    if _CACHE_DIR is None:
+        return
+    try:
+        blob = gzip.compress(
+            pickle.dumps(rules_data, protocol=pickle.HIGHEST_PROTOCOL))
+        fd, tmp = tempfile.mkstemp(dir=_CACHE_DIR)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp, _disk_cache_path(filename, mtime_ns))
+        prefix = f'{filename}.'
+        for name in os.listdir(_CACHE_DIR):
+            if (name.startswith(prefix) and name.endswith('.pkl.gz')
+                    and name != f'{filename}.{mtime_ns}.pkl.gz'):
+                os.unlink(os.path.join(_CACHE_DIR, name))
+    except OSError:
+        pass  # disk cache is best-effort
+
+
+def _store_guide(filename, key, rules_data, body=None):
+    """Stores parsed results, evicting entries for older mtimes of the file."""
+    index = _GuideIndex(rules_data)
+    with _CACHE_LOCK:
+        for stale in [k for k in _GUIDE_CACHE if k[0] == filename]:
+            del _GUIDE_CACHE[stale]
+            _RESPONSE_CACHE.pop(stale, None)
+            _SEARCH_INDEX.pop(stale, None)
+        _GUIDE_CACHE[key] = rules_data
+        _SEARCH_INDEX[key] = index
+        if body is not None:
+            _RESPONSE_CACHE[key] = body
+    _disk_cache_store(filename, key[1], rules_data)
+
+
+def parse_guide(filename):
+    """Robust parser for OpenSCAP Bootstrap-based HTML guides (cached)."""
+    path = os.path.join(GUIDES_DIR, filename)
+    key = (filename, os.stat(path).st_mtime_ns)
+    cached = _GUIDE_CACHE.get(key)
+    if cached is not None:
+        return cached
+    rules_data = _disk_cache_load(filename, key[1])
+    if rules_data is None:
+        rules_data = list(iter_guide(filename))
+        print(f"DEBUG: Found {len(rules_data)} rules in {filename}")
+    _store_guide(filename, key, rules_data)
     return rules_data
 
 # --- HTML TEMPLATE (Frontend) ---
@@ -80,8 +300,8 @@ HTML_TEMPLATE = """
 <head>
     <meta charset="UTF-8">
     <title>SCAP Security Explorer</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://unpkg.com/alpinejs" defer></script>
+    <script src="/static/tailwind.min.js"></script>
+    <script src="/static/alpine.min.js" defer></script>
 </head>
 <body class="bg-slate-100 font-sans text-slate-900" x-data="scapApp()">
 
@@ -117,7 +337,7 @@ HTML_TEMPLATE = """
                     
                     <div class="h-10 w-px bg-slate-200"></div>
 
-                    <input type="text" x-model="searchQuery" placeholder="Search rules or IDs..." 
+                    <input type="text" x-model.debounce.150ms="searchQuery" placeholder="Search rules or IDs..."
                            class="border border-slate-200 rounded-xl px-4 py-2.5 text-sm w-80 focus:ring-4 focus:ring-blue-100 focus:border-blue-500 outline-none transition-all">
                 </div>
                 
@@ -176,9 +396,15 @@ HTML_TEMPLATE = """
                 rules: [],
                 searchQuery: '',
                 filterSeverity: 'all',
+                serverMatches: null, // null = no active search
                 loading: false,
 
                 init() {
+                    // Search runs server-side against a prebuilt index.
+                    // x-model.debounce holds reactive updates (and thus
+                    // filteredRules re-evaluation) until typing settles.
+                    this.$watch('searchQuery', () => this.runSearch());
+                    this.$watch('filterSeverity', () => this.runSearch());
                     fetch('/api/profiles')
                         .then(res => res.json())
                         .then(data => {
@@ -191,11 +417,13 @@ HTML_TEMPLATE = """
                     this.selectedProfile = id;
                     this.loading = true;
                     this.rules = []; // Clear current rules while loading
+                    this.serverMatches = null;
                     fetch(`/api/rules/${id}`)
                         .then(res => res.json())
                         .then(data => {
                             this.rules = data;
                             this.loading = false;
+                            this.runSearch();
                         })
                         .catch(err => {
                             console.error("Error loading rules:", err);
@@ -203,35 +431,156 @@ HTML_TEMPLATE = """
                         });
                 },
 
+                runSearch() {
+                    if (!this.searchQuery && this.filterSeverity === 'all') {
+                        this.serverMatches = null;
+                        return;
+                    }
+                    const params = new URLSearchParams({q: this.searchQuery});
+                    if (this.filterSeverity !== 'all') params.set('sev', this.filterSeverity);
+                    fetch(`/api/search/${this.selectedProfile}?` + params)
+                        .then(res => res.json())
+                        .then(ids => { this.serverMatches = new Set(ids); })
+                        .catch(err => console.error("Search error:", err));
+                },
+
                 get filteredRules() {
-                    return this.rules.filter(r => {
-                        const matchesSearch = r.title.toLowerCase().includes(this.searchQuery.toLowerCase()) || 
-                                              r.id.toLowerCase().includes(this.searchQuery.toLowerCase());
-                        const matchesSeverity = this.filterSeverity === 'all' || r.severity === this.filterSeverity;
-                        return matchesSearch && matchesSeverity;
-                    });
+                    if (this.serverMatches === null) return this.rules;
+                    return this.rules.filter(r => this.serverMatches.has(r.id));
                 }
             }
         }
     </script>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    <link rel="stylesheet" href="/static/css/fontawesome.min.css">
 </body>
 </html>
 """
 
+# The template has no Jinja variables, so render it exactly once at
+# import time instead of re-running Jinja on every hit.
+with app.app_context():
+    _INDEX_BODY = render_template_string(HTML_TEMPLATE).encode('utf-8')
+_INDEX_ETAG = f'"{hashlib.md5(_INDEX_BODY).hexdigest()}"'
+
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    resp = Response(_INDEX_BODY, mimetype='text/html')
+    resp.headers['Cache-Control'] = 'public, max-age=3600'
+    resp.headers['ETag'] = _INDEX_ETAG
+    return resp
+
+def _not_modified(etag):
+    """True when the client's If-None-Match matches our current ETag."""
+    return request.headers.get('If-None-Match') == etag
+
 
 @app.route('/api/profiles')
 def api_profiles():
-    return jsonify(get_available_profiles())
+    try:
+        mtime = os.stat(GUIDES_DIR).st_mtime_ns
+    except OSError:
+        return jsonify([])
+    etag = f'W/"{mtime:x}"'
+    if _not_modified(etag):
+        return Response(status=304)
+    resp = jsonify(get_available_profiles())
+    resp.headers['ETag'] = etag
+    resp.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return resp
+
+@app.route('/api/search/<filename>')
+def api_search(filename):
+    try:
+        st = os.stat(os.path.join(GUIDES_DIR, filename))
+    except OSError:
+        abort(404)
+    key = (filename, st.st_mtime_ns)
+    index = _SEARCH_INDEX.get(key)
+    if index is None:
+        parse_guide(filename)  # fills _SEARCH_INDEX via _store_guide
+        index = _SEARCH_INDEX[key]
+    matches = index.search(request.args.get('q', ''),
+                           request.args.get('sev') or None)
+    return jsonify(sorted(matches))
 
 @app.route('/api/rules/<filename>')
 def api_rules(filename):
-    data = parse_guide(filename)
-    if data is None: abort(404)
-    return jsonify(data)
+    try:
+        st = os.stat(os.path.join(GUIDES_DIR, filename))
+    except OSError:
+        abort(404)
+    etag = f'W/"{st.st_mtime_ns:x}"'
+    # A matching ETag means the client already has this guide's rules;
+    # skip parsing and the body entirely.
+    if _not_modified(etag):
+        return Response(status=304)
+    key = (filename, st.st_mtime_ns)
+    body = _RESPONSE_CACHE.get(key)
+    if body is None:
+        data = _GUIDE_CACHE.get(key)
+        if data is not None:
+            body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+            _RESPONSE_CACHE[key] = body
+    if body is None:
+        # Memory caches are cold (e.g. a request racing the warm-up),
+        # but a previous run may have persisted this guide's rules;
+        # loading the pickle is far cheaper than re-parsing the HTML.
+        data = _disk_cache_load(filename, st.st_mtime_ns)
+        if data is not None:
+            body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+            _store_guide(filename, key, data, body)
+    if body is not None:
+        resp = Response(body, mimetype='application/json')
+        resp.headers['ETag'] = etag
+        resp.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return resp
+
+    # Cold cache: stream the array as parsing emits rules, so time-to-first-
+    # byte doesn't wait on the full guide, and fill the caches at the end.
+    def generate():
+        rules = []
+        chunks = ['[']
+        yield '['
+        for rule in rules_iter:
+            chunk = (',' if rules else '') + json.dumps(rule, separators=(',', ':'))
+            rules.append(rule)
+            chunks.append(chunk)
+            yield chunk
+        yield ']'
+        chunks.append(']')
+        _store_guide(filename, key, rules, ''.join(chunks).encode('utf-8'))
+
+    rules_iter = iter_guide(filename)
+    resp = Response(stream_with_context(generate()), mimetype='application/json')
+    resp.headers['ETag'] = etag
+    resp.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return resp
+
+_warmed = False
+
+def warm_guide_cache(wait=False):
+    """Parses every guide into the cache so first API hits are dict lookups.
+
+    lxml releases the GIL while parsing, so a thread pool gets real
+    parallelism here. Pass wait=True to block until every guide is
+    parsed — required before gunicorn --preload forks workers, since a
+    child forked while a warm thread holds _CACHE_LOCK would inherit
+    the lock in its held state and deadlock.
+    """
+    global _warmed
+    if _warmed:
+        return
+    _warmed = True
+    ex = ThreadPoolExecutor(max_workers=os.cpu_count())
+    for profile in get_available_profiles():
+        ex.submit(parse_guide, profile['id'])
+    ex.shutdown(wait=wait)
+
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    # Local development only. Werkzeug's dev server serializes every
+    # request; in production run via wsgi.py (see that module) so
+    # CPU-bound parses spread across gunicorn workers.
+    warm_guide_cache()
+    app.run(debug=False, port=5000)
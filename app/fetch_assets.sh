@@ -0,0 +1,19 @@
+#!/bin/sh
+# Fetches the pinned frontend assets into app/static/ so pages stop
+# pulling Tailwind/Alpine/Font Awesome from three third-party CDNs on
+# every load. Run once at deploy time (or from provisioning).
+set -eu
+cd "$(dirname "$0")/static"
+
+curl -sfL -o alpine.min.js "https://unpkg.com/alpinejs@3.14.3/dist/cdn.min.js"
+# Tailwind's browser build; swap for an `npx tailwindcss --minify`
+# precompiled sheet if a node toolchain is available.
+curl -sfL -o tailwind.min.js "https://cdn.tailwindcss.com/3.4.16"
+
+mkdir -p css webfonts
+curl -sfL -o css/fontawesome.min.css \
+    "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css"
+for f in fa-solid-900.woff2 fa-regular-400.woff2 fa-brands-400.woff2; do
+    curl -sfL -o "webfonts/$f" \
+        "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/webfonts/$f"
+done
@@ -0,0 +1,15 @@
+"""Gunicorn entrypoint.
+
+Run from this directory with:
+
+    gunicorn -w $(nproc) -k gthread --threads 4 -b 0.0.0.0:5000 --preload wsgi:application
+
+--preload warms the guide cache once in the master; forked workers
+inherit the parsed guides instead of each re-parsing on first hit.
+The warm-up must finish before the fork (wait=True): forking while a
+warm thread holds the cache lock would hand workers a lock that is
+never released.
+"""
+from app import app as application, warm_guide_cache
+
+warm_guide_cache(wait=True)